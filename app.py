@@ -1,8 +1,8 @@
-import os, requests
-from flask import Flask, request, jsonify
+import os, json, requests
+from flask import Flask, Response, request, jsonify, stream_with_context
 from bot import Chatbot
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessageChunk, HumanMessage
 from utils import extract_sources_and_result, prioritize_sources
 from tools import fetch_questions_on_latest_articles_in_IndiaSpend
 from vectorstore import StoreCustomRangeArticles, StoreDailyArticles
@@ -44,6 +44,16 @@ def documentation():
                     "sources": "Sources related to the response."
                 }
             },
+            {
+                "route": "/stream_query",
+                "method": "GET",
+                "description": "Query the chatbot and stream the response as server-sent events.",
+                "parameters": {
+                    "question": "The question to ask the chatbot (required).",
+                    "thread_id": "The thread ID for context (required)."
+                },
+                "response": "'token' events while the answer is generated, then a final event with 'response' and 'sources'."
+            },
             {
                 "route": "/store_articles",
                 "method": "POST",
@@ -99,6 +109,39 @@ def query_bot():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/stream_query', methods=['GET'])
+def stream_query_bot():
+    """
+    Stream the chatbot's answer as server-sent events.
+    """
+    question = request.args.get('question')
+    thread_id = request.args.get('thread_id')
+    if not question or not thread_id:
+        return jsonify({"error": "Missing required parameters"}), 400
+
+    input_data = {"messages": [HumanMessage(content=question)]}
+    config = {"configurable": {"thread_id": thread_id}}
+
+    def generate():
+        try:
+            for chunk, metadata in workflow.stream(input_data, config=config, stream_mode="messages"):
+                # Only forward tokens of the final answer, not intermediate LLM calls
+                if isinstance(chunk, AIMessageChunk) and chunk.content and metadata.get("final_answer"):
+                    yield f"data: {json.dumps({'token': chunk.content})}\n\n"
+
+            result = workflow.get_state(config).values['messages'][-1].content
+            result, raw_sources = extract_sources_and_result(result)
+            sources = prioritize_sources(result, raw_sources)
+            if not result:
+                result = "No response generated. Please try again."
+            yield f"data: {json.dumps({'response': result, 'sources': sources})}\n\n"
+        except Exception as e:
+            print(f"Error in stream_query_bot: {str(e)}")
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+
 
 
 # Route for Storing Articles with Custom Date Range
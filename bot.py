@@ -1,76 +1,151 @@
-from typing import Literal
-from langchain_openai import ChatOpenAI
-from langchain_openai import OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
-from langchain.chains.retrieval_qa.base import RetrievalQA
-from langchain_core.tools import tool, StructuredTool
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+import hashlib
+import re
+from typing import Literal, Optional
+from cachetools import LRUCache, TTLCache
+from langchain_core.tools import StructuredTool
+from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, MessagesState, START, END
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import ToolNode
 from pydantic import BaseModel, Field
+from cache import LockedCache, SemanticCache
+from clients import INDEX_NAME, get_embeddings, get_llm, get_vectorstore
+from memory import BoundedMemorySaver
+
+# Greetings and small talk never need the knowledge base
+SMALL_TALK_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|ok|okay|bye|good (morning|afternoon|evening))\b[\s!.?]*$",
+    re.IGNORECASE
+)
+
+SYSTEM_PROMPT = (
+    "You are IndiaSpend AI, an expert chatbot designed to answer questions related to IndiaSpend articles, reports, and data analysis. "
+    "Your responses should be fact-based, sourced from IndiaSpend's database, and align with IndiaSpend's journalistic style. "
+    "You should provide clear, well-structured answers and cite sources where applicable. "
+    "When a question comes with context, provide a detailed response using IndiaSpend's reporting style, ensuring accuracy and data-backed insights. "
+    "Website: [IndiaSpend](https://www.indiaspend.com/)."
+)
+# RAG answers are generated in one call from the retrieved documents and their source URLs ({context})
+ANSWER_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=SYSTEM_PROMPT),
+    ("human", "Question: {question}\n\nContext: {context}")
+])
+# Run metadata marking the LLM calls whose tokens are streamed to the client
+ANSWER_STREAM_METADATA = {"final_answer": True}
+# Default minimum Pinecone similarity score of the best match for a query to be routed
+# to RAG; pass `rag_score_threshold` to Chatbot to tune it for the index in use
+RAG_SCORE_THRESHOLD = 0.75
 
 class RAGQuery(BaseModel):
     query: str = Field(..., description="The query to retrieve relevant content for")
 
 class RAGTool:
     def __init__(self):
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        self.index_name = "india-spend"
-        self.vectorstore = PineconeVectorStore(
-            index_name=self.index_name,
-            embedding=self.embeddings
-        )
-        self.llm = ChatOpenAI(model_name="gpt-4o", temperature=0)
-        self.retriever = self.vectorstore.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 5}
-        )
-        self.rag_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=self.retriever,
-            return_source_documents=True  # Enable source document return
+        # Clients are process-wide singletons, so extra instances share one connection pool
+        self.embeddings = get_embeddings()
+        self.index_name = INDEX_NAME
+        self.vectorstore = get_vectorstore()
+        self.llm = get_llm()
+        # Documents are retrieved once in `retrieve` and formatted straight into the prompt,
+        # which asks for the final IndiaSpend-style answer. The answer is plain text so its
+        # tokens stream to /stream_query; the sources come from the retrieved documents.
+        self.answer_chain = ANSWER_PROMPT | self.llm | StrOutputParser()
+        # Near-duplicate questions are answered from here, skipping retrieval and generation
+        self.cache = SemanticCache(threshold=0.9, ttl=600)
+        self.embedding_cache = LockedCache(LRUCache(maxsize=256))
+        # Top matches per query, kept briefly so routing and retrieval share one Pinecone call
+        self.search_cache = LockedCache(TTLCache(maxsize=256, ttl=60))
+
+    def embed_query(self, query: str) -> list:
+        """
+        Embed a query, reusing the embedding when the same query was seen recently.
+        """
+        embedding = self.embedding_cache.get(query)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            self.embedding_cache[query] = embedding
+        return embedding
+
+    def search(self, query: str) -> list:
+        """
+        Return the top (document, score) matches for a query from Pinecone.
+        """
+        matches = self.search_cache.get(query)
+        if matches is None:
+            embedding = self.embed_query(query)
+            matches = self.vectorstore.similarity_search_by_vector_with_score(embedding, k=5)
+            self.search_cache[query] = matches
+        return matches
+
+    def _format_docs(self, similar_docs: list) -> str:
+        return "\n---\n".join(
+            f"Source: {doc.metadata.get('source', 'No source')}\n{doc.page_content}" for doc in similar_docs
         )
 
-    def retrieve(self, query: RAGQuery) -> dict:
-        print(f"Retrieving for query: {query.query}")
-        similar_docs = self.retriever.get_relevant_documents(query.query)
-        source_links = [doc.metadata.get('source', 'No source') for doc in similar_docs]
-        
-        result = self.rag_chain.invoke(query.query)
-        if isinstance(result, dict):
-            response_result = result.get('result', str(result))
-            source_documents = result.get('source_documents', [])
-            source_links.extend([doc.metadata.get('source', 'No source') for doc in source_documents])
-        else:
-            response_result = str(result)
-            
+    def _cached_answer(self, query: str, embedding: list):
+        cached = self.cache.lookup(embedding)
+        if cached is not None:
+            print(f"Semantic cache hit for query: {query}")
+        return cached
+
+    def _answer_inputs(self, query: str, matches: list) -> tuple:
+        similar_docs = [doc for doc, _ in matches]
+        return similar_docs, {"context": self._format_docs(similar_docs), "question": query}
+
+    def _store_answer(self, embedding: list, similar_docs: list, answer: str) -> dict:
         # Remove duplicates while preserving order
-        source_links = list(dict.fromkeys(source_links))
-        
-        return {
-            "result": response_result,
+        seen = set()
+        source_links = []
+        for doc in similar_docs:
+            source = doc.metadata.get('source', 'No source')
+            if source not in seen:
+                seen.add(source)
+                source_links.append(source)
+
+        payload = {
+            "result": answer,
             "sources": source_links
         }
+        self.cache.add(embedding, payload)
+        return payload
+
+    def lookup(self, query: str) -> Optional[dict]:
+        """
+        Return the cached answer of a near-duplicate query, if any.
+        """
+        return self._cached_answer(query, self.embed_query(query))
+
+    def retrieve(self, query: RAGQuery) -> dict:
+        print(f"Retrieving for query: {query.query}")
+        embedding = self.embed_query(query.query)
+        cached = self._cached_answer(query.query, embedding)
+        if cached is not None:
+            return cached
+
+        # Retrieve once and hand the documents to the answer chain
+        similar_docs, inputs = self._answer_inputs(query.query, self.search(query.query))
+        answer = self.answer_chain.invoke(inputs, config={"metadata": ANSWER_STREAM_METADATA})
+        return self._store_answer(embedding, similar_docs, answer)
 
 class Chatbot:
-    def __init__(self):
-        self.llm = ChatOpenAI(model_name="gpt-4o", temperature=0)
-        self.memory = MemorySaver()
+    def __init__(self, rag_score_threshold: float = RAG_SCORE_THRESHOLD):
+        """
+        Args:
+            rag_score_threshold (float): Minimum similarity score of the best Pinecone match
+                for a query to be answered from the knowledge base.
+        """
+        self.rag_score_threshold = rag_score_threshold
+        self.memory = BoundedMemorySaver(max_threads=10000)
         self.rag_tool = RAGTool()
+        self.llm = get_llm()
         self.tool_node = None
         self.app = None
+        # Routing decisions keyed on the query hash
+        self.decision_cache = LockedCache(TTLCache(maxsize=1024, ttl=600))
 
-        # Define the chatbot's system message
-        self.system_message = SystemMessage(
-            content=(
-                "You are IndiaSpend AI, an expert chatbot designed to answer questions related to IndiaSpend articles, reports, and data analysis. "
-                "Your responses should be fact-based, sourced from IndiaSpend's database, and align with IndiaSpend's journalistic style. "
-                "You should provide clear, well-structured answers and cite sources where applicable. "
-                "Website: [IndiaSpend](https://www.indiaspend.com/)."
-            )
-        )
+        # All static instructions live in the system message; prompts only add the query and context
+        self.system_message = SystemMessage(content=SYSTEM_PROMPT)
 
     def setup_tools(self):
         rag_tool = StructuredTool.from_function(
@@ -81,38 +156,51 @@ class Chatbot:
         )
         self.tool_node = ToolNode(tools=[rag_tool])
 
+    def _decision_key(self, query: str) -> str:
+        return hashlib.sha256(query.strip().lower().encode("utf-8")).hexdigest()
+
+    def _cached_decision(self, query: str) -> Optional[bool]:
+        if SMALL_TALK_PATTERN.match(query):
+            return False
+        return self.decision_cache.get(self._decision_key(query))
+
+    def _decide(self, query: str, matches: list) -> bool:
+        # Route to RAG only when the knowledge base holds a close enough match;
+        # the matches are reused by `retrieve` for the same query
+        use_rag = bool(matches) and matches[0][1] >= self.rag_score_threshold
+        self.decision_cache[self._decision_key(query)] = use_rag
+        return use_rag
+
     def should_use_rag(self, query: str) -> bool:
-        decision_prompt = f"Does this query require retrieving external information to answer accurately? Answer only 'yes' or 'no'. Query: {query}"
-        decision = self.llm.invoke([self.system_message, HumanMessage(content=decision_prompt)])
-        return "yes" in decision.content.lower()
+        use_rag = self._cached_decision(query)
+        if use_rag is None:
+            use_rag = self._decide(query, self.rag_tool.search(query))
+        return use_rag
+
+    def _rag_response(self, rag_result: dict) -> dict:
+        # The answer chain already produces the final answer, so no second LLM call is needed
+        formatted_response = f"{rag_result['result']}\n\nSources:\n" + "\n".join(rag_result['sources'])
+        return {"messages": [AIMessage(content=formatted_response)]}
 
     def call_model(self, state: MessagesState) -> dict:
         messages = state['messages']
-        last_message = messages[-1]
-        query = last_message.content
-        sources = []
+        query = messages[-1].content
+
+        if self._cached_decision(query) is not False:
+            # A near-duplicate of an answered RAG query is served from the semantic cache
+            # before paying for the Pinecone routing probe
+            cached = self.rag_tool.lookup(query)
+            if cached is not None:
+                return self._rag_response(cached)
 
         if self.should_use_rag(query):
             print(f"Triggering RAG tool for query: {query}")
-            rag_result = self.rag_tool.retrieve(RAGQuery(query=query))
-            result_text = rag_result['result']
-            sources = rag_result['sources']
-            
-            # Format response with context and sources
-            context = f"Context: {result_text}"
-            prompt = (
-                f"Question: {query}\n\n"
-                f"{context}\n\n"
-                "Provide a detailed response using IndiaSpend's reporting style, ensuring accuracy and data-backed insights."
-            )
-
-            response = self.llm.invoke([self.system_message, HumanMessage(content=prompt)])
-            formatted_response = f"{response.content}\n\nSources:\n" + "\n".join(sources)
-            return {"messages": [AIMessage(content=formatted_response)]}
-        
-        # For non-RAG queries, process normally
-        response = self.llm.invoke([self.system_message] + messages)
-        return {"messages": [AIMessage(content=response.content)]}
+            return self._rag_response(self.rag_tool.retrieve(RAGQuery(query=query)))
+
+        # For non-RAG queries, process normally; streaming lets graph.stream(stream_mode="messages")
+        # forward tokens as they arrive
+        chunks = self.llm.stream([self.system_message] + messages, config={"metadata": ANSWER_STREAM_METADATA})
+        return {"messages": [AIMessage(content="".join(chunk.content for chunk in chunks))]}
 
     def router_function(self, state: MessagesState) -> Literal["tools", END]:
         messages = state['messages']
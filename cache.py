@@ -0,0 +1,120 @@
+import threading
+import time
+from typing import Optional
+import numpy as np
+
+
+class SemanticCache:
+    """
+    A small in-process semantic cache keyed on query embeddings.
+
+    Entries are served when a new query embedding is close enough (cosine
+    similarity) to a previously stored one and the entry has not expired.
+    Embeddings are L2-normalized and stored as float32 rows of one contiguous
+    matrix, so a lookup is a single BLAS matrix-vector product.
+    """
+
+    def __init__(self, threshold: float = 0.9, ttl: float = 600, max_entries: int = 1000):
+        """
+        Args:
+            threshold (float): Minimum cosine similarity for a cache hit.
+            ttl (float): Time-to-live of an entry in seconds.
+            max_entries (int): Maximum number of entries kept; the oldest are dropped first.
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Preallocated storage that doubles when full; rows [0, _size) are live and oldest first
+        self._matrix = None
+        self._timestamps = None
+        self._payloads = []
+        self._size = 0
+        # Flask serves requests on separate threads that share this cache
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: list) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop_oldest(self, count: int):
+        remaining = self._size - count
+        self._matrix[:remaining] = self._matrix[count:self._size]
+        self._timestamps[:remaining] = self._timestamps[count:self._size]
+        del self._payloads[:count]
+        self._size = remaining
+
+    def _evict_expired(self, now: float):
+        if not self._size:
+            return
+        # Entries are appended in time order, so the expired ones form a prefix
+        expired = int(np.searchsorted(self._timestamps[:self._size], now - self.ttl, side="right"))
+        if expired:
+            self._drop_oldest(expired)
+
+    def lookup(self, embedding: list) -> Optional[dict]:
+        """
+        Return the cached payload closest to the given embedding, if any.
+
+        Args:
+            embedding (list): The query embedding.
+
+        Returns:
+            dict | None: The cached payload on a hit, otherwise None.
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            self._evict_expired(time.time())
+            if not self._size:
+                return None
+
+            scores = self._matrix[:self._size] @ query
+            best = int(scores.argmax())
+            return self._payloads[best] if scores[best] >= self.threshold else None
+
+    def add(self, embedding: list, payload: dict):
+        """
+        Store a payload under the given embedding.
+
+        Args:
+            embedding (list): The query embedding.
+            payload (dict): The value to serve on future hits.
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None:
+                capacity = min(16, self.max_entries)
+                self._matrix = np.empty((capacity, vector.shape[0]), dtype=np.float32)
+                self._timestamps = np.empty(capacity, dtype=np.float64)
+            if self._size == self.max_entries:
+                self._drop_oldest(1)
+            if self._size == len(self._matrix):
+                capacity = min(2 * len(self._matrix), self.max_entries)
+                self._matrix = np.resize(self._matrix, (capacity, vector.shape[0]))
+                self._timestamps = np.resize(self._timestamps, capacity)
+
+            self._matrix[self._size] = vector
+            self._timestamps[self._size] = time.time()
+            self._payloads.append(payload)
+            self._size += 1
+
+
+class LockedCache:
+    """
+    Serializes `get`/set access to a cachetools cache, which is not thread-safe on
+    its own. Flask serves each request on its own thread while the caches are shared.
+    """
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        # TTLCache expires entries on read, so reads need the lock too
+        with self._lock:
+            return self._cache.get(key, default)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._cache[key] = value
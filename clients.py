@@ -0,0 +1,50 @@
+from functools import lru_cache
+import httpx
+from langchain_openai import ChatOpenAI
+from langchain_pinecone import PineconeVectorStore
+from embeddings import ConcurrentOpenAIEmbeddings
+
+INDEX_NAME = "india-spend"
+
+# Shared by every OpenAI client so requests reuse pooled keep-alive connections
+_HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    # Only the sync pool is shared: an async pool is bound to the event loop that first
+    # uses it, and Flask runs each async route on a new loop. Async callers such as the
+    # ingestion in utils.py build their own clients per call.
+    return httpx.Client(limits=_HTTP_LIMITS)
+
+
+@lru_cache(maxsize=1)
+def get_llm() -> ChatOpenAI:
+    """
+    Return the process-wide gpt-4o client used by the chatbot.
+    """
+    return ChatOpenAI(
+        model_name="gpt-4o",
+        temperature=0,
+        streaming=True,
+        http_client=get_http_client()
+    )
+
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> ConcurrentOpenAIEmbeddings:
+    """
+    Return the process-wide embeddings client used for queries and documents.
+    """
+    return ConcurrentOpenAIEmbeddings(
+        model="text-embedding-3-small",
+        http_client=get_http_client()
+    )
+
+
+@lru_cache(maxsize=1)
+def get_vectorstore() -> PineconeVectorStore:
+    """
+    Return the process-wide Pinecone vector store for the IndiaSpend index.
+    """
+    return PineconeVectorStore(index_name=INDEX_NAME, embedding=get_embeddings())
@@ -0,0 +1,92 @@
+import asyncio
+from typing import List, Optional
+import numpy as np
+import tiktoken
+from langchain_openai import OpenAIEmbeddings
+
+
+class ConcurrentOpenAIEmbeddings(OpenAIEmbeddings):
+    """
+    OpenAIEmbeddings that sends the sub-batches of `aembed_documents` concurrently
+    instead of awaiting each request before starting the next one.
+    """
+
+    max_concurrency: int = 8
+    """Maximum number of embedding requests in flight at once."""
+
+    def _split_by_tokens(self, texts: List[str]) -> tuple:
+        # Same length-safe scheme as OpenAIEmbeddings: texts longer than the model
+        # context are split into token windows whose embeddings are averaged later
+        try:
+            encoding = tiktoken.encoding_for_model(self.tiktoken_model_name or self.model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        encode_kwargs = {
+            key: value
+            for key, value in {
+                "allowed_special": self.allowed_special,
+                "disallowed_special": self.disallowed_special,
+            }.items()
+            if value is not None
+        }
+        pieces, owners = [], []
+        for index, text in enumerate(texts):
+            tokens = encoding.encode(text, **encode_kwargs)
+            for start in range(0, len(tokens), self.embedding_ctx_length):
+                pieces.append(tokens[start:start + self.embedding_ctx_length])
+                owners.append(index)
+        return pieces, owners
+
+    async def aembed_documents(self, texts: List[str], chunk_size: Optional[int] = None) -> List[List[float]]:
+        """
+        Embed documents, issuing one request per chunk with at most `max_concurrency` in flight.
+
+        Args:
+            texts (list): The texts to embed.
+            chunk_size (int, optional): Inputs per request. Defaults to `self.chunk_size`.
+
+        Returns:
+            list: One embedding per text, in input order.
+        """
+        if self.check_embedding_ctx_length and not self.tiktoken_enabled:
+            # The HuggingFace tokenizer path is rare enough to leave to the serial implementation
+            return await super().aembed_documents(texts, chunk_size)
+
+        if self.check_embedding_ctx_length:
+            inputs, owners = self._split_by_tokens(texts)
+        else:
+            inputs, owners = list(texts), list(range(len(texts)))
+
+        step = chunk_size or self.chunk_size
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def embed(batch):
+            async with semaphore:
+                response = await self.async_client.create(input=batch, **self._invocation_params)
+            return [item.embedding for item in response.data]
+
+        responses = await asyncio.gather(
+            *(embed(inputs[i:i + step]) for i in range(0, len(inputs), step))
+        )
+        piece_embeddings = [embedding for response in responses for embedding in response]
+
+        grouped = [[] for _ in texts]
+        weights = [[] for _ in texts]
+        for owner, piece, embedding in zip(owners, inputs, piece_embeddings):
+            grouped[owner].append(embedding)
+            weights[owner].append(len(piece))
+
+        embeddings, empty_embedding = [], None
+        for group, group_weights in zip(grouped, weights):
+            if not group:
+                # An empty text has no tokens to send, so embed the empty string as the base class does
+                if empty_embedding is None:
+                    response = await self.async_client.create(input="", **self._invocation_params)
+                    empty_embedding = response.data[0].embedding
+                embeddings.append(empty_embedding)
+            elif len(group) == 1:
+                embeddings.append(group[0])
+            else:
+                average = np.average(group, axis=0, weights=group_weights)
+                embeddings.append((average / np.linalg.norm(average)).tolist())
+        return embeddings
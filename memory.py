@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+from langgraph.checkpoint.memory import MemorySaver
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    An in-memory checkpointer that keeps at most `max_threads` conversation threads,
+    evicting the least recently used ones so long-running deployments stay bounded.
+    """
+
+    def __init__(self, max_threads: int = 10000, **kwargs):
+        """
+        Args:
+            max_threads (int): Maximum number of thread IDs whose checkpoints are kept.
+        """
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self._recent_threads = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, config: dict):
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._recent_threads[thread_id] = None
+            self._recent_threads.move_to_end(thread_id)
+            if len(self._recent_threads) <= self.max_threads:
+                return
+            # Evict a tenth of the capacity at once so the scan below runs rarely
+            target = self.max_threads - max(1, self.max_threads // 10)
+            evicted = set()
+            while len(self._recent_threads) > target:
+                evicted.add(self._recent_threads.popitem(last=False)[0])
+        self._evict(evicted)
+
+    def _evict(self, thread_ids: set):
+        for thread_id in thread_ids:
+            self.storage.pop(thread_id, None)
+        for key in list(self.writes):
+            if key[0] in thread_ids:
+                self.writes.pop(key, None)
+        # Newer langgraph-checkpoint releases keep channel values in a separate `blobs` map
+        blobs = getattr(self, "blobs", None)
+        if blobs is not None:
+            for key in list(blobs):
+                if key[0] in thread_ids:
+                    blobs.pop(key, None)
+
+    def get_tuple(self, config):
+        # A thread without checkpoints has nothing to return; probing it must not take an
+        # LRU slot, nor leave an empty entry behind in the `storage` defaultdict
+        if config["configurable"]["thread_id"] not in self.storage:
+            return None
+        self._touch(config)
+        return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        self._touch(config)
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id):
+        self._touch(config)
+        return super().put_writes(config, writes, task_id)
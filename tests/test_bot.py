@@ -0,0 +1,98 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessageChunk, HumanMessage
+import bot
+from bot import Chatbot
+
+
+class FakeRAGTool:
+    def __init__(self):
+        self.score = 0.9
+        self.cached = None
+        self.searches = []
+        self.lookups = []
+
+    def search(self, query):
+        self.searches.append(query)
+        if self.score is None:
+            return []
+        return [(Document(page_content="Context", metadata={"source": "https://www.indiaspend.com/a"}), self.score)]
+
+    def lookup(self, query):
+        self.lookups.append(query)
+        return self.cached
+
+    def retrieve(self, query):
+        return {"result": f"Answer to {query.query}", "sources": ["https://www.indiaspend.com/a"]}
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def stream(self, messages, config=None):
+        self.calls += 1
+        yield AIMessageChunk(content="Hello")
+        yield AIMessageChunk(content="!")
+
+
+@pytest.fixture
+def chatbot(monkeypatch):
+    monkeypatch.setattr(bot, "RAGTool", FakeRAGTool)
+    monkeypatch.setattr(bot, "get_llm", FakeLLM)
+    return Chatbot()
+
+
+def test_small_talk_skips_the_knowledge_base(chatbot):
+    assert chatbot.should_use_rag("Hi!") is False
+    assert chatbot.should_use_rag("thank you") is False
+    assert chatbot.rag_tool.searches == []
+
+
+@pytest.mark.parametrize("score, expected", [(0.9, True), (0.75, True), (0.74, False), (None, False)])
+def test_routes_on_best_match_score(chatbot, score, expected):
+    chatbot.rag_tool.score = score
+    assert chatbot.should_use_rag("What is India's literacy rate?") is expected
+
+
+def test_threshold_is_configurable(monkeypatch):
+    monkeypatch.setattr(bot, "RAGTool", FakeRAGTool)
+    monkeypatch.setattr(bot, "get_llm", FakeLLM)
+    chatbot = Chatbot(rag_score_threshold=0.4)
+    chatbot.rag_tool.score = 0.5
+
+    assert chatbot.should_use_rag("What is India's literacy rate?") is True
+
+
+def test_decisions_are_cached_per_normalized_query(chatbot):
+    assert chatbot.should_use_rag("Air pollution in Delhi") is True
+    chatbot.rag_tool.score = 0.1
+
+    assert chatbot.should_use_rag("  air pollution in delhi ") is True
+    assert chatbot.rag_tool.searches == ["Air pollution in Delhi"]
+
+
+def test_call_model_answers_from_knowledge_base_with_sources(chatbot):
+    result = chatbot.call_model({"messages": [HumanMessage(content="Air pollution in Delhi")]})
+
+    content = result["messages"][0].content
+    assert content.startswith("Answer to Air pollution in Delhi")
+    assert "Sources:\nhttps://www.indiaspend.com/a" in content
+    assert chatbot.llm.calls == 0
+
+
+def test_call_model_serves_semantic_cache_hit_without_routing(chatbot):
+    chatbot.rag_tool.cached = {"result": "Cached answer", "sources": []}
+
+    result = chatbot.call_model({"messages": [HumanMessage(content="Air pollution in Delhi")]})
+
+    assert result["messages"][0].content.startswith("Cached answer")
+    assert chatbot.rag_tool.searches == []
+
+
+def test_call_model_streams_small_talk_from_the_llm(chatbot):
+    result = chatbot.call_model({"messages": [HumanMessage(content="hello")]})
+
+    assert result["messages"][0].content == "Hello!"
+    assert chatbot.rag_tool.lookups == []
+    assert chatbot.rag_tool.searches == []
@@ -0,0 +1,124 @@
+import threading
+import numpy as np
+import pytest
+from cachetools import TTLCache
+import cache
+from cache import LockedCache, SemanticCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "time", fake)
+    return fake
+
+
+def unit(index: int, dim: int = 32) -> list:
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[index] = 1.0
+    return vector.tolist()
+
+
+def test_lookup_hits_similar_embedding(clock):
+    semantic_cache = SemanticCache(threshold=0.9)
+    semantic_cache.add(unit(0), {"answer": "a"})
+
+    nearby = np.array(unit(0)) + 0.05 * np.array(unit(1))
+    assert semantic_cache.lookup(nearby.tolist()) == {"answer": "a"}
+
+
+def test_lookup_misses_dissimilar_embedding(clock):
+    semantic_cache = SemanticCache(threshold=0.9)
+    assert semantic_cache.lookup(unit(0)) is None
+
+    semantic_cache.add(unit(0), {"answer": "a"})
+    assert semantic_cache.lookup(unit(1)) is None
+
+
+def test_lookup_returns_closest_entry(clock):
+    semantic_cache = SemanticCache(threshold=0.5)
+    semantic_cache.add(unit(0), {"answer": "a"})
+    semantic_cache.add(unit(1), {"answer": "b"})
+
+    assert semantic_cache.lookup(unit(1)) == {"answer": "b"}
+
+
+def test_entries_expire_after_ttl(clock):
+    semantic_cache = SemanticCache(ttl=60)
+    semantic_cache.add(unit(0), {"answer": "old"})
+    clock.now += 30
+    semantic_cache.add(unit(1), {"answer": "new"})
+
+    clock.now += 31
+    assert semantic_cache.lookup(unit(0)) is None
+    assert semantic_cache.lookup(unit(1)) == {"answer": "new"}
+    assert semantic_cache._size == 1
+
+    clock.now += 30
+    assert semantic_cache.lookup(unit(1)) is None
+    assert semantic_cache._size == 0
+
+
+def test_oldest_entry_dropped_at_max_entries(clock):
+    semantic_cache = SemanticCache(max_entries=3)
+    for i in range(4):
+        semantic_cache.add(unit(i), {"answer": i})
+
+    assert semantic_cache._size == 3
+    assert semantic_cache.lookup(unit(0)) is None
+    for i in range(1, 4):
+        assert semantic_cache.lookup(unit(i)) == {"answer": i}
+
+
+def test_capacity_grows_past_initial_allocation(clock):
+    semantic_cache = SemanticCache(max_entries=40)
+    for i in range(20):
+        semantic_cache.add(unit(i), {"answer": i})
+
+    assert len(semantic_cache._matrix) == 32
+    assert semantic_cache._size == 20
+    for i in range(20):
+        assert semantic_cache.lookup(unit(i)) == {"answer": i}
+
+    for i in range(20, 32):
+        semantic_cache.add(unit(i), {"answer": i})
+    semantic_cache.add(unit(0), {"answer": "again"})
+
+    # Growth is capped at max_entries
+    assert len(semantic_cache._matrix) == 40
+    assert semantic_cache._size == 33
+
+
+def test_concurrent_adds_keep_rows_and_payloads_aligned(clock):
+    semantic_cache = SemanticCache(max_entries=64)
+
+    def worker(offset: int):
+        for i in range(offset, 32, 4):
+            semantic_cache.add(unit(i), {"answer": i})
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert semantic_cache._size == 32
+    for i in range(32):
+        assert semantic_cache.lookup(unit(i)) == {"answer": i}
+
+
+def test_locked_cache_wraps_get_and_set():
+    locked = LockedCache(TTLCache(maxsize=2, ttl=60))
+    locked["a"] = 1
+
+    assert locked.get("a") == 1
+    assert locked.get("missing") is None
+    assert locked.get("missing", False) is False
@@ -0,0 +1,70 @@
+from langgraph.checkpoint.base import empty_checkpoint
+from memory import BoundedMemorySaver
+
+
+def config_for(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+def make_saver(max_threads: int) -> BoundedMemorySaver:
+    saver = BoundedMemorySaver(max_threads=max_threads)
+    # Stand-in for the blob map newer checkpoint releases keep alongside storage and writes
+    if not hasattr(saver, "blobs"):
+        saver.blobs = {}
+    return saver
+
+
+def save_thread(saver: BoundedMemorySaver, thread_id: str):
+    checkpoint = empty_checkpoint()
+    saved = saver.put(config_for(thread_id), checkpoint, {"source": "input", "step": 0, "writes": {}}, {})
+    saver.put_writes(saved, [("messages", "hello")], task_id="task")
+    saver.blobs[(thread_id, "", "messages", "1")] = ("json", b"hello")
+
+
+def test_least_recently_used_threads_are_evicted():
+    saver = make_saver(max_threads=10)
+
+    for i in range(10):
+        save_thread(saver, f"thread-{i}")
+    # Reading thread-0 makes it the most recently used one
+    assert saver.get_tuple(config_for("thread-0")) is not None
+
+    save_thread(saver, "thread-10")
+
+    # Overflow evicts a tenth of the capacity, leaving nine threads
+    evicted = {"thread-1", "thread-2"}
+    kept = {"thread-0"} | {f"thread-{i}" for i in range(3, 11)}
+    assert set(saver.storage) == kept
+    assert {key[0] for key in saver.writes} == kept
+    assert {key[0] for key in saver.blobs} == kept
+    for thread_id in evicted:
+        assert saver.get_tuple(config_for(thread_id)) is None
+    assert saver.get_tuple(config_for("thread-0")) is not None
+
+
+def test_probing_unknown_threads_does_not_evict_conversations():
+    saver = make_saver(max_threads=10)
+    for i in range(10):
+        save_thread(saver, f"thread-{i}")
+
+    for i in range(20):
+        assert saver.get_tuple(config_for(f"unknown-{i}")) is None
+
+    assert set(saver.storage) == {f"thread-{i}" for i in range(10)}
+    assert len(saver._recent_threads) == 10
+
+
+def test_pending_writes_mark_thread_as_recent():
+    saver = BoundedMemorySaver(max_threads=10)
+    saved = {}
+    for i in range(10):
+        config = config_for(f"thread-{i}")
+        saved[i] = saver.put(config, empty_checkpoint(), {"source": "input", "step": 0, "writes": {}}, {})
+    # A write to the oldest thread makes it the most recently used one
+    saver.put_writes(saved[0], [("messages", "hello")], task_id="task")
+
+    saver.put(config_for("thread-10"), empty_checkpoint(), {"source": "input", "step": 0, "writes": {}}, {})
+
+    assert "thread-0" in saver.storage
+    assert {key[0] for key in saver.writes} == {"thread-0"}
+    assert "thread-1" not in saver.storage
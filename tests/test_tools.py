@@ -0,0 +1,180 @@
+import threading
+import pytest
+import requests
+import tools
+from tools import ArticleQuestions, QuestionsBatch, fetch_questions_on_latest_articles_in_IndiaSpend
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code: int = 200, articles: list = None, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._articles = articles or []
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return {"news": self._articles}
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def batch(self, messages):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return [
+            QuestionsBatch(articles=[ArticleQuestions(id=0, questions=[f"Question {self.calls}?"])])
+            for _ in messages
+        ]
+
+
+ARTICLES = [{"heading": "Heat waves", "description": "Rising temperatures", "story": "Cities recorded highs."}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(tools.time, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeLLM()
+    monkeypatch.setattr(tools, "_get_llm", lambda: fake)
+    monkeypatch.setattr(tools, "_truncate", lambda text, max_tokens: text)
+    monkeypatch.setattr(tools, "_build_prompts", lambda articles: ["prompt"])
+    return fake
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(tools, "_questions_cache", {"etag": None, "last_modified": None, "payload": None, "ts": 0})
+
+
+@pytest.fixture
+def api(monkeypatch):
+    requests_seen = []
+    responses = []
+
+    def get(url, headers=None, timeout=None):
+        requests_seen.append(headers)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(tools._session, "get", get)
+    return requests_seen, responses
+
+
+def prime(api, clock):
+    requests_seen, responses = api
+    responses.append(FakeResponse(articles=ARTICLES, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024"}))
+    return fetch_questions_on_latest_articles_in_IndiaSpend()
+
+
+def test_questions_are_served_from_cache_within_ttl(api, llm, clock):
+    assert prime(api, clock) == {"questions": ["Question 1?"]}
+
+    clock.now += tools.QUESTIONS_CACHE_TTL - 1
+    assert fetch_questions_on_latest_articles_in_IndiaSpend() == {"questions": ["Question 1?"]}
+    assert len(api[0]) == 1
+    assert llm.calls == 1
+
+
+def test_not_modified_reuses_questions_after_ttl(api, llm, clock):
+    prime(api, clock)
+    requests_seen, responses = api
+
+    clock.now += tools.QUESTIONS_CACHE_TTL + 1
+    responses.append(FakeResponse(status_code=304))
+    assert fetch_questions_on_latest_articles_in_IndiaSpend() == {"questions": ["Question 1?"]}
+    assert requests_seen[-1]["if-none-match"] == '"v1"'
+    assert requests_seen[-1]["if-modified-since"] == "Mon, 01 Jan 2024"
+    assert llm.calls == 1
+
+    # The 304 restarts the TTL
+    assert fetch_questions_on_latest_articles_in_IndiaSpend() == {"questions": ["Question 1?"]}
+    assert len(requests_seen) == 2
+
+
+def test_changed_articles_regenerate_questions(api, llm, clock):
+    prime(api, clock)
+    clock.now += tools.QUESTIONS_CACHE_TTL + 1
+    api[1].append(FakeResponse(articles=ARTICLES, headers={"ETag": '"v2"'}))
+
+    assert fetch_questions_on_latest_articles_in_IndiaSpend() == {"questions": ["Question 2?"]}
+    assert tools._questions_cache["etag"] == '"v2"'
+
+
+@pytest.mark.parametrize("failure", [
+    requests.exceptions.ConnectionError("down"),
+    requests.exceptions.RetryError("too many retries"),
+    FakeResponse(status_code=503),
+])
+def test_failed_fetch_serves_stale_questions(api, llm, clock, failure):
+    prime(api, clock)
+    clock.now += tools.QUESTIONS_CACHE_TTL + 1
+    api[1].append(failure)
+
+    assert fetch_questions_on_latest_articles_in_IndiaSpend() == {"questions": ["Question 1?"]}
+
+
+def test_failed_fetch_without_cache_returns_error(api, llm, clock):
+    api[1].append(requests.exceptions.ConnectionError("down"))
+
+    assert "error" in fetch_questions_on_latest_articles_in_IndiaSpend()
+
+
+def test_failed_generation_serves_stale_questions(api, llm, clock):
+    prime(api, clock)
+    clock.now += tools.QUESTIONS_CACHE_TTL + 1
+    api[1].append(FakeResponse(articles=ARTICLES, headers={"ETag": '"v2"'}))
+    llm.error = RuntimeError("rate limited")
+
+    assert fetch_questions_on_latest_articles_in_IndiaSpend() == {"questions": ["Question 1?"]}
+    # The old validators stay, so the next call revalidates against the cached questions
+    assert tools._questions_cache["etag"] == '"v1"'
+
+
+def test_concurrent_refreshes_share_one_fetch(api, llm, clock, monkeypatch):
+    prime(api, clock)
+    clock.now += tools.QUESTIONS_CACHE_TTL + 1
+
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_get(url, headers=None, timeout=None):
+        calls.append(headers)
+        started.set()
+        release.wait(5)
+        return FakeResponse(status_code=304)
+
+    monkeypatch.setattr(tools._session, "get", slow_get)
+    refresher = threading.Thread(target=fetch_questions_on_latest_articles_in_IndiaSpend)
+    refresher.start()
+    assert started.wait(5)
+
+    # Other requests get the stale questions instead of starting their own refresh
+    results = [fetch_questions_on_latest_articles_in_IndiaSpend() for _ in range(3)]
+    release.set()
+    refresher.join()
+
+    assert results == [{"questions": ["Question 1?"]}] * 3
+    assert len(calls) == 1
+    assert llm.calls == 1
@@ -1,22 +1,101 @@
 import re
+import threading
+import time
+from functools import lru_cache
 import requests
-from langchain_community.chat_models import ChatOpenAI
+import tiktoken
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, Field
+from clients import get_http_client
+
+# Shared session so repeated fetches reuse pooled keep-alive connections
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=10,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+))
+
+# Generated questions are reused until the TTL expires or the API reports new articles
+QUESTIONS_CACHE_TTL = 600
+_questions_cache = {"etag": None, "last_modified": None, "payload": None, "ts": 0}
+# Held while the questions are refreshed so concurrent requests share one regeneration
+_questions_lock = threading.Lock()
+
+# Articles covered by each question-generation prompt; prompts are sent concurrently
+ARTICLES_PER_PROMPT = 5
+
+# Token budgets for story excerpts and for each combined prompt
+STORY_EXCERPT_TOKENS = 120
+MAX_PROMPT_TOKENS = 8000
+
+# Pattern used to extract keywords while building prompts
+_WORD = re.compile(r'\b\w+\b')
+
+class ArticleQuestions(BaseModel):
+    id: int = Field(..., description="The article number given in the prompt")
+    questions: list[str] = Field(..., description="The questions generated for the article")
+
+class QuestionsBatch(BaseModel):
+    articles: list[ArticleQuestions]
+
+@lru_cache(maxsize=1)
+def _get_llm():
+    """
+    Lazily build the question-generation LLM so importing this module does not
+    construct an OpenAI client. The model returns the questions as structured
+    JSON, so no post-processing is needed.
+    """
+    llm = ChatOpenAI(
+        temperature=0,
+        model_name='gpt-4o',
+        http_client=get_http_client()
+    )
+    return llm.with_structured_output(QuestionsBatch)
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    return tiktoken.encoding_for_model("gpt-4o")
+
+def _truncate(text, max_tokens):
+    """
+    Truncates text to at most `max_tokens` gpt-4o tokens.
+    """
+    encoding = _get_encoding()
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]) + "..."
 
-# Initialize the LLM
-llm = ChatOpenAI(temperature=0, model_name='gpt-4o')
+def _build_prompts(articles):
+    """
+    Builds the prompts for a group of articles, halving the group until every
+    prompt fits within MAX_PROMPT_TOKENS.
 
-def generate_questions_batch(articles):
+    Parameters:
+        articles (list): List of article dictionaries.
+
+    Returns:
+        list: One or more prompts covering all the articles.
     """
-    Generates specific, concise questions for a batch of articles using an LLM,
-    focusing on keywords and actionable information. The questions are returned 
-    randomly arranged and cleaned up.
+    prompt = _build_batch_prompt(articles)
+    if len(articles) > 1 and len(_get_encoding().encode(prompt)) >= MAX_PROMPT_TOKENS:
+        middle = len(articles) // 2
+        return _build_prompts(articles[:middle]) + _build_prompts(articles[middle:])
+    return [prompt]
+
+def _build_batch_prompt(articles):
+    """
+    Builds a single question-generation prompt covering all the given articles.
 
     Parameters:
         articles (list): List of article dictionaries.
 
     Returns:
-        list: A list of questions randomly arranged and cleaned up.
+        str: The combined prompt.
     """
     # Construct a single prompt for all articles in the batch
     input_prompts = []
@@ -27,51 +106,96 @@ def generate_questions_batch(articles):
         story = article.get("story", "No story content available.")
         
         # Extract keywords from the article description and story for more specific question generation
-        keywords = list(set(re.findall(r'\b\w+\b', description + " " + story.lower())))[:10]  # Convert set to list and slice first 10 words
+        # (a dict keeps the first occurrence order while removing duplicates)
+        seen = {}
+        for match in _WORD.finditer((description + " " + story).lower()):
+            seen.setdefault(match.group(), None)
+        keywords = list(seen)[:10]
         
         input_prompts.append(f"""
+        Article ID: {i}
         Title: {title}
         Description: {description}
-        Story Excerpt: {story[:500]}... (truncated for brevity)
+        Story Excerpt: {_truncate(story, STORY_EXCERPT_TOKENS)}
         Keywords: {', '.join(keywords)}
         Generate two concise, specific questions (under 60 characters) based on the article content.
         Ensure the questions meet the following criteria:
         1. Focus on actionable or data-driven information from the article.
         2. Do not include the article title, article labels, or headings in the questions.
-        3. Do not use bullet points or article numbers.
-        4. Return only the questions (no introductory text or labels).
-        5. Keep the questions under 60 characters each.
-        6. Return the questions in a shuffled order.
+        3. Do not use bullet points or article numbers in the question text.
+        4. Keep the questions under 60 characters each.
+        5. Return the questions in a shuffled order.
         """)
 
 
 
     # Combine all prompts into one input
-    batch_prompt = "\n".join(input_prompts)
+    return "\n".join(input_prompts) + "\n\nReturn the questions for every article, keyed by its Article ID."
 
-    try:
-        # Create a HumanMessage object for the LLM
-        message = HumanMessage(content=batch_prompt)
+def generate_questions_batch(articles):
+    """
+    Generates specific, concise questions for a batch of articles using an LLM,
+    focusing on keywords and actionable information. The questions are returned 
+    randomly arranged as structured output. Articles are split into groups of
+    ARTICLES_PER_PROMPT whose prompts are sent to the LLM concurrently.
 
-        # Invoke the LLM with the message
-        response = llm.invoke([message])
+    Parameters:
+        articles (list): List of article dictionaries.
 
-        # Split the response into individual lines (questions)
-        questions = response.content.strip().split("\n")
+    Returns:
+        list: A list of questions randomly arranged.
+    """
+    groups = [articles[i:i + ARTICLES_PER_PROMPT] for i in range(0, len(articles), ARTICLES_PER_PROMPT)]
 
-        # Remove any empty strings from the list of questions
-        cleaned_questions = [q.strip() for q in questions if q.strip()]
+    try:
+        # Create one HumanMessage per group and run the LLM calls in parallel
+        messages = [[HumanMessage(content=prompt)] for group in groups for prompt in _build_prompts(group)]
+        results = _get_llm().batch(messages)
 
-        return cleaned_questions
+        return [question for result in results for article in result.articles for question in article.questions]
 
     except Exception as e:
         print(f"Error generating questions: {e}")
         return []
 
+def _fresh_questions():
+    """
+    Returns the cached questions while they are within QUESTIONS_CACHE_TTL, otherwise None.
+    """
+    if _questions_cache["payload"] and time.time() - _questions_cache["ts"] < QUESTIONS_CACHE_TTL:
+        return _questions_cache["payload"]
+    return None
+
 def fetch_questions_on_latest_articles_in_IndiaSpend():
     """
     Fetches the latest articles from the IndiaSpend API and generates up to 20
-    concise questions in batches.
+    concise questions in batches. Results are cached for QUESTIONS_CACHE_TTL
+    seconds, after which the API is revalidated with a conditional GET and the
+    questions are only regenerated when the articles have changed. Only one
+    thread refreshes at a time; the others serve the stale questions meanwhile.
+
+    Returns:
+        dict: A dictionary containing all questions from the articles in a single list.
+    """
+    cached = _fresh_questions()
+    if cached is not None:
+        return cached
+
+    # Without stale questions to fall back on, wait for the running refresh instead
+    if not _questions_lock.acquire(blocking=_questions_cache["payload"] is None):
+        return _questions_cache["payload"]
+    try:
+        cached = _fresh_questions()
+        if cached is not None:
+            return cached
+        return _refresh_questions()
+    finally:
+        _questions_lock.release()
+
+def _refresh_questions():
+    """
+    Revalidates the articles with the IndiaSpend API and regenerates the questions
+    when they changed, falling back to the cached questions on any failure.
 
     Returns:
         dict: A dictionary containing all questions from the articles in a single list.
@@ -79,16 +203,29 @@ def fetch_questions_on_latest_articles_in_IndiaSpend():
     api_url = 'https://indiaspend.com/dev/h-api/news'
     headers = {
         "accept": "*/*",
+        "accept-encoding": "gzip",
         "s-id": "yP4PEm9PqCPxxiMuHDyYz0PIjAHxHbYpTQi9E4AtNk0R4bp9Lsf0hyN4AEKKiM9I"
     }
+    if _questions_cache["payload"]:
+        if _questions_cache["etag"]:
+            headers["if-none-match"] = _questions_cache["etag"]
+        if _questions_cache["last_modified"]:
+            headers["if-modified-since"] = _questions_cache["last_modified"]
     print(f"Fetching articles from API: {api_url}")
 
     try:
-        response = requests.get(api_url, headers=headers)
+        response = _session.get(api_url, headers=headers, timeout=(3, 10))
+        if response.status_code == 304:
+            _questions_cache["ts"] = time.time()
+            return _questions_cache["payload"]
         response.raise_for_status()
         data = response.json()
     except requests.exceptions.RequestException as e:
+        # RetryError is a RequestException too, so exhausted retries also land here
         print(f"Failed to fetch articles: {e}")
+        if _questions_cache["payload"]:
+            # Serve the stale questions rather than an error; the next call retries the fetch
+            return _questions_cache["payload"]
         return {"error": f"Failed to fetch articles: {e}"}
 
     articles = data.get("news", [])
@@ -99,8 +236,18 @@ def fetch_questions_on_latest_articles_in_IndiaSpend():
     # Limit articles to 10 (as each article generates 2 questions)
     articles = articles[:10]
 
-    # Generate questions in a single batch
+    # Generate questions in concurrent batches
     questions = generate_questions_batch(articles)
+    if not questions:
+        # Generation failed; keep serving the previous questions if there are any
+        return _questions_cache["payload"] or {"questions": []}
 
     # Ensure only 20 questions are returned
-    return {"questions": questions[:20]}
+    result = {"questions": questions[:20]}
+    _questions_cache.update(
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        payload=result,
+        ts=time.time()
+    )
+    return result
@@ -141,13 +141,14 @@ def extract_clean_sources(response: dict) -> list:
 ################################################VECTOR STORE DATABASE################################################################
 
 
-import datetime, json
+import asyncio, datetime, json, uuid
 import requests
 from bs4 import BeautifulSoup
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 from langchain_pinecone import Pinecone
-from langchain_openai import OpenAIEmbeddings
+from pinecone import Pinecone as PineconeClient
+from embeddings import ConcurrentOpenAIEmbeddings
 
 async def store_daily_articles():
     """
@@ -336,9 +337,26 @@ async def fetch_docs_custom_range(urls):
 
 
 async def store_docs_in_pinecone(docs, index_name, urls):
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+    # Not the shared get_embeddings() client: Flask runs each async route on a new event
+    # loop, so the async OpenAI client must be created inside this one
+    embeddings = ConcurrentOpenAIEmbeddings(model="text-embedding-3-small")
     print(f"Storing {len(docs)} document chunks to Pinecone index '{index_name}'...")
-    pine_vs = Pinecone.from_documents(documents = docs, embedding = embeddings, index_name=index_name)
+    if docs:
+        # Embed all chunks with concurrent requests, then upsert the vectors in the
+        # same layout PineconeVectorStore uses (page content under the "text" key)
+        vectors = await embeddings.aembed_documents([doc.page_content for doc in docs])
+        records = [
+            (str(uuid.uuid4()), vector, {**doc.metadata, "text": doc.page_content})
+            for doc, vector in zip(docs, vectors)
+        ]
+        index = PineconeClient().Index(index_name)
+        # upsert(batch_size=...) sends its batches one after another, so fan them out
+        # over worker threads instead; the default executor bounds the parallelism
+        await asyncio.gather(*(
+            asyncio.to_thread(index.upsert, vectors=records[i:i + 64], show_progress=False)
+            for i in range(0, len(records), 64)
+        ))
+    pine_vs = Pinecone(index_name=index_name, embedding=embeddings)
     print(f"Added {len(docs)} Articles chunks in the pinecone")
     await add_urls_to_database(json.dumps(urls))
     print(f"Successfully stored documents. Associated URLs: {urls}")